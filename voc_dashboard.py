@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
+import csv
+import glob
 from datetime import datetime, date
 import smtplib
 from email.message import EmailMessage
@@ -21,6 +23,11 @@ MERGED_PATH = "merged.xlsx"        # VOC 통합파일
 FEEDBACK_PATH = "feedback.csv"     # 처리내역 CSV 저장 경로
 CONTACT_PATH = "contact_map.xlsx"  # 담당자 매핑 파일
 
+FEEDBACK_COLUMNS = ["계약번호_정제", "고객대응내용", "등록자", "등록일자", "비고"]
+
+# 계약번호 정제 패턴 (영문/숫자 외 제거). Arrow 정규식 커널을 타도록 문자열 패턴으로 유지
+CN_CLEAN_PATTERN = r"[^0-9A-Za-z]"
+
 # Plotly 사용 여부
 try:
     import plotly.express as px
@@ -28,6 +35,43 @@ try:
 except Exception:
     HAS_PLOTLY = False
 
+# PyArrow 사용 여부 (문자열 컬럼을 Arrow 기반 string dtype 으로 보관)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+except Exception:
+    HAS_PYARROW = False
+
+STRING_DTYPE = "string[pyarrow]" if HAS_PYARROW else "string"
+
+
+def contains_mask(series: pd.Series, needle: str) -> np.ndarray:
+    """부분 문자열 포함 여부 (Arrow 문자열 컬럼이면 pc.match_substring 으로 C 레벨 스캔)."""
+    if HAS_PYARROW and getattr(series.dtype, "storage", None) == "pyarrow":
+        hit = pc.match_substring(pa.array(series), needle)
+        return np.asarray(pc.fill_null(hit, False), dtype=bool)
+    return series.str.contains(needle, regex=False, na=False).to_numpy()
+
+
+def contains_all_mask(frame: pd.DataFrame, terms: list[tuple[str, str]]) -> np.ndarray:
+    """
+    (컬럼, 검색어) 조건을 모두 만족하는 행 mask.
+    Arrow 컬럼끼리는 pc.and_ 로 Arrow 버퍼 안에서 결합 후 numpy 변환은 한 번만 수행.
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    arrow_hit = None
+    for col, needle in terms:
+        series = frame[col]
+        if HAS_PYARROW and getattr(series.dtype, "storage", None) == "pyarrow":
+            hit = pc.fill_null(pc.match_substring(pa.array(series), needle), False)
+            arrow_hit = hit if arrow_hit is None else pc.and_(arrow_hit, hit)
+        else:
+            mask &= contains_mask(series, needle)
+    if arrow_hit is not None:
+        mask &= np.asarray(arrow_hit, dtype=bool)
+    return mask
+
 
 # ------------------------------------------------
 # 🔹 공통 막대그래프 (Plotly / 기본차트 자동 선택)
@@ -56,8 +100,7 @@ def force_bar_chart(df: pd.DataFrame, x: str, y: str, height: int = 280):
 # ==============================
 st.set_page_config(page_title="해지 VOC 종합 대시보드", layout="wide")
 
-st.markdown(
-    """
+APP_CSS = """
     <style>
     html, body {
         background-color: #f5f5f7 !important;
@@ -133,6 +176,24 @@ st.markdown(
         color: #4b5563;
         margin-top: 0.2rem;
     }
+    .kpi-row {
+        display: flex;
+        gap: 1.0rem;
+        margin-bottom: 0.6rem;
+    }
+    .kpi-card {
+        flex: 1;
+        padding: 0.2rem 0;
+    }
+    .kpi-label {
+        font-size: 0.875rem;
+        color: #4b5563;
+    }
+    .kpi-value {
+        font-size: 2.0rem;
+        font-weight: 500;
+        line-height: 1.3;
+    }
     .element-container:has(> div[data-testid="stMetric"]) {
         padding-top: 0 !important;
         padding-bottom: 0.4rem !important;
@@ -154,9 +215,10 @@ st.markdown(
         background-color: transparent !important;
     }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+
+# Streamlit 은 매 rerun 마다 화면을 다시 그리므로 style 블록도 매번 1회 출력해야 유지됨
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # ==============================
 # 2. SMTP 설정
@@ -188,6 +250,14 @@ def safe_str(x):
     return str(x).strip()
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """다운로드/첨부용 CSV(utf-8-sig) 바이트 (동일 DataFrame 이면 재인코딩 생략)."""
+    # "_" 로 시작하는 내부 보조 컬럼(_matched 등)은 내보내지 않음
+    df = df.loc[:, ~df.columns.astype(str).str.startswith("_")]
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
 def detect_column(df: pd.DataFrame, keywords: list[str]) -> str | None:
     """컬럼명 자동 탐색."""
     for k in keywords:
@@ -203,13 +273,94 @@ def detect_column(df: pd.DataFrame, keywords: list[str]) -> str | None:
 # ==============================
 # 4. 데이터 로드 함수
 # ==============================
+def read_excel_fast(path: str) -> pd.DataFrame:
+    """Calamine 엔진으로 엑셀 로드 (python-calamine 미설치 시 기본 openpyxl 로 대체)."""
+    try:
+        return pd.read_excel(path, engine="calamine")
+    except (ImportError, ValueError):
+        return pd.read_excel(path)
+
+
+# 정제 로직/dtype 을 바꾸면 올려서 기존 Parquet 캐시를 무효화
+PARQUET_CACHE_VERSION = "v2"
+
+
+def parquet_cache_path(source_path: str) -> str:
+    """캐시 버전 + 원본 엑셀 mtime+size 를 키로 한 Parquet 캐시 경로 (예: merged.v2_1733300000_52311.parquet)."""
+    stat = os.stat(source_path)
+    stem = os.path.splitext(source_path)[0]
+    return f"{stem}.{PARQUET_CACHE_VERSION}_{int(stat.st_mtime)}_{stat.st_size}.parquet"
+
+
+def read_parquet_cache(parquet_path: str) -> pd.DataFrame | None:
+    """키가 일치하는 Parquet 캐시가 있으면 읽고, 없거나 읽기 실패 시 None."""
+    if not os.path.exists(parquet_path):
+        return None
+    try:
+        return pd.read_parquet(parquet_path)
+    except Exception:
+        return None
+
+
+def arrow_safe_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """str/int 가 섞인 object 컬럼(예: 서비스개시일, 설치우편번호)은 Arrow 변환이 안 되므로 문자열로 통일."""
+    if not HAS_PYARROW:
+        return df
+    mixed_cols = []
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            mixed_cols.append(col)
+    if mixed_cols:
+        df[mixed_cols] = df[mixed_cols].astype(STRING_DTYPE)
+    return df
+
+
+def write_parquet_cache(df: pd.DataFrame, parquet_path: str) -> None:
+    """정제 결과를 Parquet 로 저장하고 이전 키의 캐시는 정리 (pyarrow 미설치 시 생략, 저장 실패는 경고)."""
+    if not HAS_PYARROW:
+        return
+    try:
+        df.to_parquet(parquet_path, index=False)
+    except Exception as e:
+        st.warning(f"⚠️ Parquet 캐시 저장 실패 ({os.path.basename(parquet_path)}): {e}")
+        return
+
+    stem = parquet_path.rsplit(".", 2)[0]
+    # 이전 키의 캐시 + 키 없는 구버전 캐시(merged.parquet) 정리
+    for old_path in glob.glob(f"{stem}.*.parquet") + glob.glob(f"{stem}.parquet"):
+        if old_path != parquet_path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+def read_excel_cached(path: str) -> pd.DataFrame:
+    """원본 엑셀을 Parquet 캐시 경유로 로드 (엑셀이 바뀌지 않았으면 XLSX 파싱 생략)."""
+    cache_path = parquet_cache_path(path)
+    cached = read_parquet_cache(cache_path)
+    if cached is not None:
+        return cached
+
+    df = arrow_safe_frame(read_excel_fast(path))
+    write_parquet_cache(df, cache_path)
+    return df
+
+
 @st.cache_data
 def load_voc_data(path: str) -> pd.DataFrame:
     if not os.path.exists(path):
         st.error("❌ 'merged.xlsx' 파일이 존재하지 않습니다. 저장소 루트에 있는지 확인해주세요.")
         return pd.DataFrame()
 
-    df = pd.read_excel(path)
+    cache_path = parquet_cache_path(path)
+    cached = read_parquet_cache(cache_path)
+    if cached is not None:
+        return cached
+
+    df = read_excel_fast(path)
 
     # 숫자형 문자열화
     for col in ["계약번호", "고객번호"]:
@@ -227,11 +378,12 @@ def load_voc_data(path: str) -> pd.DataFrame:
 
     # 계약번호 정제
     if "계약번호" in df.columns:
+        # Arrow string dtype 으로 변환 후 치환 → pyarrow.compute 정규식 커널로 처리
         df["계약번호_정제"] = (
             df["계약번호"]
             .astype(str)
-            .str.replace(r"[^0-9A-Za-z]", "", regex=True)
-            .str.strip()
+            .astype(STRING_DTYPE)
+            .str.replace(CN_CLEAN_PATTERN, "", regex=True)
         )
     else:
         df["계약번호_정제"] = ""
@@ -240,20 +392,34 @@ def load_voc_data(path: str) -> pd.DataFrame:
     if "접수일시" in df.columns:
         df["접수일시"] = pd.to_datetime(df["접수일시"], errors="coerce")
 
+    # 검색 대상 문자열 컬럼 → string dtype (부분검색 벡터 처리)
+    for col in ["계약번호_정제", "상호"]:
+        if col in df.columns:
+            df[col] = df[col].astype(STRING_DTYPE)
+
+    # 출처: 저카디널리티 → category
+    if "출처" in df.columns:
+        df["출처"] = df["출처"].astype("category")
+
+    # 캐시 적중 시와 같은 dtype 이 되도록 저장 전 정규화한 프레임을 그대로 반환
+    df = arrow_safe_frame(df)
+    write_parquet_cache(df, cache_path)
     return df
 
 
 @st.cache_data
-def load_feedback(path: str) -> pd.DataFrame:
+def load_feedback(path: str, file_key: tuple = ()) -> pd.DataFrame:
+    """file_key(수정시각, 크기)가 바뀌면 캐시를 새로 읽음 → 세션 간 1개 사본 공유."""
+    # 계약번호는 로드 시 한 번만 문자열로 고정 (이후 비교에서 astype(str) 불필요)
+    # 빈 칸(예: 비고 미입력)은 NaN 이 아닌 빈 문자열로 유지 → 화면에 "nan" 표시 방지
+    read_opts = {"dtype": {"계약번호_정제": str}, "keep_default_na": False}
     if os.path.exists(path):
         try:
-            fb = pd.read_csv(path, encoding="utf-8-sig")
+            fb = pd.read_csv(path, encoding="utf-8-sig", **read_opts)
         except Exception:
-            fb = pd.read_csv(path)
+            fb = pd.read_csv(path, **read_opts)
     else:
-        fb = pd.DataFrame(
-            columns=["계약번호_정제", "고객대응내용", "등록자", "등록일자", "비고"]
-        )
+        fb = pd.DataFrame(columns=FEEDBACK_COLUMNS)
     return fb
 
 
@@ -261,22 +427,51 @@ def save_feedback(path: str, fb_df: pd.DataFrame) -> None:
     fb_df.to_csv(path, index=False, encoding="utf-8-sig")
 
 
+def append_feedback(path: str, row: dict) -> None:
+    """처리내역 1건만 파일 끝에 추가 (전체 이력을 다시 쓰지 않음)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        save_feedback(path, pd.DataFrame([row], columns=FEEDBACK_COLUMNS))
+        return
+
+    # 기존 파일의 헤더 순서에 맞춰 값 배치
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f), FEEDBACK_COLUMNS)
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerow([row.get(c, "") for c in header])
+
+
+def feedback_file_key(path: str) -> tuple:
+    if not os.path.exists(path):
+        return ()
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_feedback_df() -> pd.DataFrame:
+    """처리내역 DataFrame (파일 변경 시에만 다시 로드)."""
+    return load_feedback(FEEDBACK_PATH, feedback_file_key(FEEDBACK_PATH))
+
+
+@st.cache_data
+def feedback_positions(path: str, file_key: tuple = ()) -> dict:
+    """처리내역의 계약번호별 행 위치 dict (저장으로 file_key 가 바뀌면 재생성)."""
+    return load_feedback(path, file_key).groupby("계약번호_정제", sort=False).indices
+
+
 @st.cache_data
 def load_contact_map(path: str):
     """
     담당자 매핑 파일 로드.
-    반환: (contact_df, manager_contacts_dict)
-      - contact_df: 정제된 DataFrame
-      - manager_contacts_dict: {담당자: {"email":..., "phone":...}}
+    반환: 정제된 contact_df (구역담당자_통합 / 이메일 / 휴대폰)
     """
     if not os.path.exists(path):
         st.warning(
             f"❌ 담당자 매핑 파일 '{path}' 을(를) 찾을 수 없습니다. "
             "담당자 알림 탭에서는 직접 이메일 주소를 입력해서 사용해주세요."
         )
-        return pd.DataFrame(), {}
+        return pd.DataFrame()
 
-    df_c = pd.read_excel(path)
+    df_c = read_excel_cached(path)
 
     # 🔍 컬럼 자동 탐색 (연락처 오타 '연략처' 포함)
     name_col = detect_column(df_c, ["구역담당자", "담당자", "처리자1", "성명", "이름"])
@@ -285,7 +480,7 @@ def load_contact_map(path: str):
 
     if not name_col:
         st.warning("담당자 매핑 파일에서 담당자 이름 컬럼을 찾지 못했습니다.")
-        return df_c, {}
+        return df_c
 
     # 사용할 컬럼만 선택
     cols = [name_col]
@@ -306,46 +501,59 @@ def load_contact_map(path: str):
 
     # 📱 휴대폰 컬럼 숫자만 남기고 정제 (뒷 4자리 로그인용)
     if "휴대폰" in df_c.columns:
-        df_c["휴대폰"] = df_c["휴대폰"].apply(
-            lambda x: "".join(ch for ch in safe_str(x) if ch.isdigit())
+        df_c["휴대폰"] = (
+            df_c["휴대폰"].fillna("").astype(str).str.replace(r"\D", "", regex=True)
         )
 
-    # 🔗 최종 매핑 딕셔너리 생성
-    manager_contacts: dict[str, dict] = {}
-    for _, row in df_c.iterrows():
-        name = safe_str(row.get("구역담당자_통합", ""))
-        if not name:
-            continue
+    return df_c
 
-        email = safe_str(row.get("이메일", "")) if "이메일" in df_c.columns else ""
-        phone = safe_str(row.get("휴대폰", "")) if "휴대폰" in df_c.columns else ""
 
-        manager_contacts[name] = {
-            "email": email,
-            "phone": phone,
-        }
+@st.cache_resource
+def build_manager_contacts(path: str) -> tuple[dict, dict]:
+    """
+    담당자 매핑 딕셔너리 (세션 간 공유 리소스 → 캐시 hit 시 pickle 복사 없음).
+    반환: ({담당자: {"email":..., "phone":...}}, {담당자: 휴대폰})
+    """
+    df_c = load_contact_map(path)
 
-    return df_c, manager_contacts
+    def _clean_col(col: str) -> np.ndarray:
+        if col not in df_c.columns:
+            return np.full(len(df_c), "", dtype=object)
+        return df_c[col].fillna("").astype(str).str.strip().to_numpy()
+
+    names = _clean_col("구역담당자_통합")
+    emails = _clean_col("이메일")
+    phones = _clean_col("휴대폰")
+
+    manager_contacts: dict[str, dict] = {
+        name: {"email": email, "phone": phone}
+        for name, email, phone in zip(names, emails, phones)
+        if name
+    }
+    # 로그인용: 이름 -> 휴대폰 전체번호
+    contacts_phone = {
+        name: info["phone"] for name, info in manager_contacts.items() if info["phone"]
+    }
+    return manager_contacts, contacts_phone
 
 
 # ==============================
 # 5. 실제 데이터 로딩
 # ==============================
-df = load_voc_data(MERGED_PATH)
-if df.empty:
-    st.stop()
+@st.cache_data
+def voc_row_count(path: str) -> int:
+    """원본 행 수 (rerun 마다 전체 DataFrame 사본을 꺼내지 않고 비어있는지만 확인)."""
+    return len(load_voc_data(path))
 
-if "feedback_df" not in st.session_state:
-    st.session_state["feedback_df"] = load_feedback(FEEDBACK_PATH)
 
-contact_df, manager_contacts = load_contact_map(CONTACT_PATH)
+if not os.path.exists(MERGED_PATH):
+    st.error("❌ 'merged.xlsx' 파일이 존재하지 않습니다. 저장소 루트에 있는지 확인해주세요.")
+    st.stop()
+if voc_row_count(MERGED_PATH) == 0:
+    st.stop()
 
-# 로그인용: 이름 -> 휴대폰 전체번호
-contacts_phone = {
-    name: info.get("phone", "")
-    for name, info in manager_contacts.items()
-    if info.get("phone", "")
-}
+contact_df = load_contact_map(CONTACT_PATH)
+manager_contacts, contacts_phone = build_manager_contacts(CONTACT_PATH)
 
 
 # -----------------------------------------
@@ -446,154 +654,253 @@ LOGIN_USER = st.session_state["login_user"]   # 관리자: ADMIN / 사용자: 
 # ==============================
 # 7. 기본 전처리 (지사, 담당자, 출처 등)
 # ==============================
-# 지사 축약
-if "관리지사" in df.columns:
-    df["관리지사"] = df["관리지사"].replace(
-        {
-            "중앙지사": "중앙",
-            "강북지사": "강북",
-            "서대문지사": "서대문",
-            "고양지사": "고양",
-            "의정부지사": "의정부",
-            "남양주지사": "남양주",
-            "강릉지사": "강릉",
-            "원주지사": "원주",
-        }
-    )
-else:
-    df["관리지사"] = ""
-
 BRANCH_ORDER = ["중앙", "강북", "서대문", "고양", "의정부", "남양주", "강릉", "원주"]
 
+zone_priority = ["영업구역번호", "담당상세", "영업구역정보"]
+mgr_priority = ["구역담당자", "담당자", "처리자"]
+
+# 매칭 대상 출처
+OTHER_SOURCES = ["해지시설", "해지요청", "설변", "정지", "해지파이프라인"]
+
+FEE_BAND_LEVELS = ["10만 미만", "10만 이상", "미기재"]
+RISK_LEVELS = ["HIGH", "MEDIUM", "LOW"]
+
+# 저카디널리티 문자열 컬럼 → category (메모리 절감, groupby/isin 코드 기반 처리)
+VOC_CATEGORY_COLS = [
+    "관리지사",
+    "리스크등급",
+    "매칭여부",
+    "월정료구간",
+    "구역담당자_통합",
+    "VOC유형",
+    "VOC유형중",
+    "VOC유형소",
+    "계약상태(중)",
+    "서비스(소)",
+    "처리자",
+    "담당유형",
+    "처리유형",
+]
+
+# 수치 컬럼 다운캐스트 (월정료 는 원 단위 → float32 로 충분, 경과일수 는 build_enriched 에서 Int32)
+VOC_FLOAT32_COLS = ["월정료_수치"]
+
 def sort_branch(series):
-    return sorted(
-        [s for s in series if s in BRANCH_ORDER],
-        key=lambda x: BRANCH_ORDER.index(x),
-    )
+    """BRANCH_ORDER 순서로 존재하는 지사만 반환 (관리지사 category 가 같은 순서로 정의됨)."""
+    present = set(series)
+    return [b for b in BRANCH_ORDER if b in present]
+
+def sort_manager(series: pd.Series) -> list[str]:
+    """담당자 선택 목록 (category 컬럼이면 사용 중인 카테고리만 꺼내 정렬)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.remove_unused_categories().cat.categories
+    else:
+        values = series.dropna().unique()
+    return sorted({str(v) for v in values})
 
-def make_zone(row):
-    if "영업구역번호" in row and pd.notna(row["영업구역번호"]):
-        return row["영업구역번호"]
-    if "담당상세" in row and pd.notna(row["담당상세"]):
-        return row["담당상세"]
-    if "영업구역정보" in row and pd.notna(row["영업구역정보"]):
-        return row["영업구역정보"]
-    return ""
+def category_options(series: pd.Series) -> list[str]:
+    """선택 목록용 정렬 고유값 (category 컬럼은 전체 스캔 없이 .cat.categories 사용)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.categories
+    else:
+        values = series.dropna().unique()
+    return sorted({str(v) for v in values})
+
+def first_valid_column(
+    frame: pd.DataFrame,
+    candidates: list[str],
+    skip_blank: bool = False,
+    blank_values: tuple = ("",),
+    fill="",
+) -> pd.Series:
+    """
+    candidates 순서대로 첫 유효값을 Series.combine_first 체인으로 선택
+    (axis=1 중간 DataFrame 없이 정렬된 Series 끼리 병합).
+    skip_blank=True 이면 strip 후 blank_values 에 해당하는 값도 결측으로 취급.
+    어느 컬럼에도 값이 없으면 fill 로 채움.
+    """
+    picked = None
+    for c in candidates:
+        if c not in frame.columns:
+            continue
+        col = frame[c].astype(object)
+        if skip_blank:
+            col = col.where(~col.astype(str).str.strip().isin(blank_values))
+        picked = col if picked is None else picked.combine_first(col)
 
-df["영업구역_통합"] = df.apply(make_zone, axis=1)
+    if picked is None:
+        return pd.Series(fill, index=frame.index, dtype=object)
+    return picked.fillna(fill)
 
-mgr_priority = ["구역담당자", "담당자", "처리자"]
 
-def pick_manager(row):
-    for c in mgr_priority:
-        if c in row and pd.notna(row[c]) and str(row[c]).strip() != "":
-            return row[c]
-    return ""
+@st.cache_data
+def build_enriched(path: str, today: date):
+    """
+    VOC 통합파일 전처리 전체를 한 번에 수행 (파일 경로 + 기준일자 단위 캐시).
+    반환: (df_voc, df_other, fee_raw_col)
+    """
+    df = load_voc_data(path)
 
-df["구역담당자_통합"] = df.apply(pick_manager, axis=1)
+    # 지사 축약 ("XX지사" → "XX", 목록에 없는 신규 지사도 동일하게 처리)
+    if "관리지사" in df.columns:
+        df["관리지사"] = df["관리지사"].astype(STRING_DTYPE).str.removesuffix("지사")
+    else:
+        df["관리지사"] = ""
 
-# 주소 컬럼 자동 탐색
-address_cols = [c for c in df.columns if "주소" in str(c)]
+    # 관리지사 → category (BRANCH_ORDER 를 앞에 두고, 목록 외 지사는 뒤에 그대로 유지)
+    branch_extra = sorted(
+        (b for b in df["관리지사"].dropna().unique() if b not in BRANCH_ORDER), key=str
+    )
+    df["관리지사"] = df["관리지사"].astype(
+        pd.CategoricalDtype(categories=BRANCH_ORDER + branch_extra)
+    )
 
-# 출처 분리
-df_voc = df[df.get("출처") == "해지VOC"].copy()
-df_other = df[df.get("출처") != "해지VOC"].copy()
+    df["영업구역_통합"] = first_valid_column(df, zone_priority)
+    df["구역담당자_통합"] = first_valid_column(df, mgr_priority, skip_blank=True)
 
-# 👉 여기서 SP 필터 적용
-if "담당유형" in df_voc.columns:
-    df_voc = df_voc[df_voc["담당유형"].astype(str) == "SP"]
+    # 출처 분리 (출처 는 category → 코드 비교 mask 한 번으로 양쪽 분리)
+    if "출처" in df.columns:
+        is_voc = (df["출처"] == "해지VOC").to_numpy()
+    else:
+        is_voc = np.zeros(len(df), dtype=bool)
+    df_other = df[~is_voc]  # 조회 전용 → copy 불필요
 
-other_sets = {
-    src: set(df_other[df_other["출처"] == src]["계약번호_정제"].dropna())
-    for src in ["해지시설", "해지요청", "설변", "정지", "해지파이프라인"]
-    if "출처" in df_other.columns
-}
-other_union = set().union(*other_sets.values()) if other_sets else set()
+    # 👉 여기서 SP 필터 적용 (출처 mask 와 합쳐 한 번만 추출)
+    voc_mask = is_voc
+    if "담당유형" in df.columns:
+        voc_mask = voc_mask & (df["담당유형"].astype(str) == "SP").to_numpy()
 
-# 설치주소
-def coalesce_cols(row, candidates):
-    for c in candidates:
-        if c in row.index:
-            val = row[c]
-            if pd.notna(val) and str(val).strip() not in ["", "None", "nan"]:
-                return val
-    return np.nan
-
-df_voc["설치주소_표시"] = df_voc.apply(
-    lambda r: coalesce_cols(r, ["시설_설치주소", "설치주소"]),
-    axis=1,
-)
+    # 접수일시 오름차순 정렬 (NaT 는 맨 뒤) → 날짜 필터를 이진 탐색 구간 슬라이스로 처리
+    # (정렬 결과가 새 DataFrame 이므로 파생 컬럼 추가용 별도 copy 불필요)
+    if "접수일시" in df.columns:
+        df_voc = df[voc_mask].sort_values("접수일시", kind="stable")
+    else:
+        df_voc = df[voc_mask].copy()
 
-# 월정료 정제
-fee_raw_col = "시설_KTT월정료(조정)" if "시설_KTT월정료(조정)" in df_voc.columns else None
+    # 매칭 대상 출처의 계약번호 합집합 (한 번의 mask + unique)
+    # Python set 으로 바꾸지 않고 같은 string dtype 배열 그대로 isin 에 전달 → C 레벨 해시
+    if "출처" in df_other.columns:
+        other_union = (
+            df_other.loc[df_other["출처"].isin(OTHER_SOURCES), "계약번호_정제"]
+            .dropna()
+            .unique()
+        )
+    else:
+        other_union = []
+
+    # 설치주소: 시설_설치주소 → 설치주소 순 첫 유효값 ("None"/"nan" 문자열도 결측 취급)
+    df_voc["설치주소_표시"] = first_valid_column(
+        df_voc,
+        ["시설_설치주소", "설치주소"],
+        skip_blank=True,
+        blank_values=("", "None", "nan"),
+        fill=np.nan,
+    ).astype(STRING_DTYPE)
+
+    # 월정료 정제
+    fee_raw_col = "시설_KTT월정료(조정)" if "시설_KTT월정료(조정)" in df_voc.columns else None
+
+    if fee_raw_col is not None:
+        # 쉼표 등 숫자/소수점 이외 문자 제거 후 일괄 수치 변환 (200,000 이상은 1/10 보정)
+        fee_digits = (
+            df_voc[fee_raw_col]
+            .astype("string")
+            .str.replace(r"[^0-9.]", "", regex=True)
+        )
+        fee_num = pd.to_numeric(fee_digits, errors="coerce").astype(float)
+        df_voc["월정료_수치"] = fee_num.mask(fee_num >= 200000, fee_num / 10.0)
+
+        # 천단위 콤마 표시 문자열 (결측은 빈 문자열)
+        df_voc[fee_raw_col] = (
+            df_voc["월정료_수치"]
+            .map("{:,.0f}".format)
+            .where(df_voc["월정료_수치"].notna(), "")
+        )
 
-def parse_fee(x: object) -> float:
-    if pd.isna(x):
-        return np.nan
-    s = str(x).strip()
-    if s == "" or s.lower() in ["nan", "none"]:
-        return np.nan
-    s = s.replace(",", "")
-    digits = "".join(ch for ch in s if (ch.isdigit() or ch == "."))
-    if digits == "":
-        return np.nan
-    try:
-        v = float(digits)
-    except Exception:
-        return np.nan
-    if v >= 200000:
-        v = v / 10.0
-    return v
+        fee_vals = df_voc["월정료_수치"].to_numpy()
+        fee_band_codes = np.select(
+            [np.isnan(fee_vals), fee_vals >= 100000], [2, 1], default=0
+        ).astype(np.int8)
+        df_voc["월정료구간"] = pd.Categorical.from_codes(
+            fee_band_codes, categories=FEE_BAND_LEVELS
+        )
+    else:
+        df_voc["월정료_수치"] = np.nan
+        df_voc["월정료구간"] = "미기재"
+
+    # 리스크/경과일 계산
+    # 접수일시는 load_voc_data 에서 이미 datetime 으로 변환되어 있으므로
+    # datetime64[D] 정수 연산으로 일 단위 경과일 계산 (NaT → NaN)
+    if "접수일시" in df_voc.columns:
+        received_days = df_voc["접수일시"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        received_nat = np.isnat(received_days)
+        elapsed_days = (np.datetime64(today, "D") - received_days).astype(np.int64).astype(float)
+        elapsed_days[received_nat] = np.nan
+    else:
+        elapsed_days = np.full(len(df_voc), np.nan)
+
+    # 정수 일수 표시 (결측은 <NA> 유지 → "361.0" 대신 "361")
+    df_voc["경과일수"] = pd.array(elapsed_days, dtype="Int32")
+    # 등급은 int8 코드로 바로 계산해 category 로 부착 (NaN 경과일은 비교가 모두 False → LOW)
+    risk_codes = np.select(
+        [elapsed_days <= 3, elapsed_days <= 10], [0, 1], default=2
+    ).astype(np.int8)
+    df_voc["리스크등급"] = pd.Categorical.from_codes(risk_codes, categories=RISK_LEVELS)
+
+    # 매칭여부 (boolean 플래그 + 표시용 문자열)
+    df_voc["_matched"] = df_voc["계약번호_정제"].isin(other_union).to_numpy()
+    df_voc["매칭여부"] = pd.Categorical.from_codes(
+        df_voc["_matched"].to_numpy().astype(np.int8), categories=["비매칭(X)", "매칭(O)"]
+    )
 
-if fee_raw_col is not None:
-    df_voc["월정료_수치"] = df_voc[fee_raw_col].apply(parse_fee)
+    # 계약번호 정수 코드 (유니크 계약 수 집계 시 문자열 재해시 방지)
+    df_voc["_cn_code"] = pd.factorize(df_voc["계약번호_정제"])[0].astype(np.int32)
 
-    def format_fee(v):
-        if pd.isna(v):
-            return ""
-        return f"{int(round(v, 0)):,}"
+    for c in VOC_CATEGORY_COLS:
+        if c in df_voc.columns:
+            df_voc[c] = df_voc[c].astype("category")
 
-    df_voc[fee_raw_col] = df_voc["월정료_수치"].apply(format_fee)
+    for c in VOC_FLOAT32_COLS:
+        if c in df_voc.columns:
+            df_voc[c] = df_voc[c].astype(np.float32)
 
-    def fee_band(v):
-        if pd.isna(v):
-            return "미기재"
-        if v >= 100000:
-            return "10만 이상"
-        return "10만 미만"
+    return df_voc, df_other, fee_raw_col
 
-    df_voc["월정료구간"] = df_voc["월정료_수치"].apply(fee_band)
-else:
-    df_voc["월정료_수치"] = np.nan
-    df_voc["월정료구간"] = "미기재"
 
-# 리스크/경과일 계산
+# 리스크/경과일 기준일
 today = date.today()
 
-def compute_risk(row):
-    dt = row.get("접수일시")
-    if pd.isna(dt):
-        return np.nan, "LOW"
-    if not isinstance(dt, (pd.Timestamp, datetime)):
-        try:
-            dt = pd.to_datetime(dt, errors="coerce")
-        except Exception:
-            return np.nan, "LOW"
-    if pd.isna(dt):
-        return np.nan, "LOW"
-
-    days = (today - dt.date()).days
-    if days <= 3:
-        level = "HIGH"
-    elif days <= 10:
-        level = "MEDIUM"
-    else:
-        level = "LOW"
-    return days, level
+df_voc, df_other, fee_raw_col = build_enriched(MERGED_PATH, today)
+
+
+# ------------------------------------------------
+# 🔹 계약번호 → 행 위치 인덱스 (선택 계약 이력 조회용 해시 인덱스)
+# ------------------------------------------------
+EMPTY_POS = np.array([], dtype=np.intp)
 
-df_voc[["경과일수", "리스크등급"]] = df_voc.apply(
-    lambda r: pd.Series(compute_risk(r)), axis=1
-)
+
+@st.cache_data
+def contract_positions(path: str, today: date) -> tuple[dict, dict]:
+    """df_voc / df_other 의 계약번호별 행 위치 dict (groupby.indices) — 선택 시 dict 조회 + take."""
+    voc, other, _ = build_enriched(path, today)
+    return (
+        voc.groupby("계약번호_정제", sort=False).indices,
+        other.groupby("계약번호_정제", sort=False).indices,
+    )
+
+
+@st.cache_data(max_entries=64)
+def contract_history(
+    path: str, today: date, cn: str, _voc: pd.DataFrame, _other: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    선택 계약의 VOC 이력(최신순) · 기타 출처 이력 (계약번호별 캐시 → 다른 위젯 변경 시 재계산 없음).
+    _voc/_other 는 해시하지 않고 (path, today) 로 데이터 버전을 식별.
+    """
+    voc_pos, other_pos = contract_positions(path, today)
+    voc_hist = _voc.take(voc_pos.get(cn, EMPTY_POS)).sort_values("접수일시", ascending=False)
+    other_hist = _other.take(other_pos.get(cn, EMPTY_POS))
+    return voc_hist, other_hist
 
 def infer_cancel_reason(row):
     text_parts = []
@@ -736,17 +1043,12 @@ def recommend_retention_policy(row):
         "fee_tier": fee_tier,
     }
 
-# 매칭여부
-df_voc["매칭여부"] = df_voc["계약번호_정제"].apply(
-    lambda x: "매칭(O)" if x in other_union else "비매칭(X)"
-)
-
 # 로그인 타입별 비매칭 풀 (unmatched_global) - 초기 버전
 if LOGIN_TYPE == "user":
     df_user = df_voc[df_voc["구역담당자_통합"] == LOGIN_USER]
-    unmatched_global = df_user[df_user["매칭여부"] == "비매칭(X)"].copy()
+    unmatched_global = df_user[~df_user["_matched"]]
 else:
-    unmatched_global = df_voc[df_voc["매칭여부"] == "비매칭(X)"].copy()
+    unmatched_global = df_voc[~df_voc["_matched"]]
 
 # ==============================
 # 8. 표시 컬럼 / 스타일링
@@ -784,9 +1086,17 @@ fixed_order = [
 display_cols_raw = [c for c in fixed_order if c in df_voc.columns]
 
 def filter_valid_columns(cols, df_base):
+    # 전체 컬럼의 non-null 개수를 한 번에 구해 전부 비어있는 컬럼은 바로 제외하고,
+    # 숫자/날짜 컬럼은 non-null 이 있으면 문자열 검사 없이 유효로 처리
+    non_null = df_base[cols].count()
     valid_cols = []
     for c in cols:
+        if non_null[c] == 0:
+            continue
         series = df_base[c]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            valid_cols.append(c)
+            continue
         mask_valid = series.notna() & ~series.astype(str).str.strip().isin(
             ["", "None", "nan"]
         )
@@ -796,31 +1106,85 @@ def filter_valid_columns(cols, df_base):
 
 display_cols = filter_valid_columns(display_cols_raw, df_voc)
 
+@st.cache_data
+def voc_latest_rank(path: str, today: date) -> np.ndarray:
+    """df_voc 행 위치별 최신순 순위 (접수일시 내림차순 stable, 결측은 맨 뒤) — 1회 정렬 후 캐시."""
+    voc, _, _ = build_enriched(path, today)
+    order = (
+        voc["접수일시"]
+        .reset_index(drop=True)
+        .sort_values(ascending=False, kind="stable")
+        .index.to_numpy()
+    )
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+    return rank
+
+
+voc_rank = voc_latest_rank(MERGED_PATH, today)
+
+
+def latest_per_contract(df_in: pd.DataFrame) -> pd.DataFrame:
+    """계약번호당 최신 VOC 1행 + 접수건수 (df_in 은 df_voc 의 부분집합)."""
+    # map 으로만 쓰므로 건수 정렬 생략
+    counts = df_in["계약번호_정제"].value_counts(sort=False)
+    # 캐시된 전역 순위로 계약별 최소 순위 행 선택 → 필터된 행 중 최신 행 (전체 재정렬 없음)
+    rank = voc_rank[df_voc.index.get_indexer(df_in.index)]
+    best = (
+        pd.Series(rank)
+        .groupby(df_in["_cn_code"].to_numpy(), sort=False)
+        .min()
+        .to_numpy()
+    )
+    # 표시 순서는 기존과 같이 계약번호 순 (정렬은 계약 수 만큼만)
+    df_latest = df_in.take(pd.Index(rank).get_indexer(best)).sort_values(
+        "계약번호_정제", kind="stable"
+    )
+    df_latest["접수건수"] = (
+        df_latest["계약번호_정제"].map(counts).to_numpy().astype(np.int32)
+    )
+    return df_latest
+
+# 대용량 요약 표는 Styler 없이 원본 DataFrame 으로 표시 (행 단위 색칠은 소형 이력 표에만 적용)
+SUMMARY_COLUMN_CONFIG = {
+    "리스크등급": st.column_config.TextColumn("리스크등급"),
+}
+
+# Styler 는 전체 행을 Python 콜백으로 색칠 → 이 행 수를 넘으면 색칠 없이 가상 스크롤 렌더링
+STYLE_RISK_MAX_ROWS = 500
+
 def style_risk(df_view: pd.DataFrame):
-    if "리스크등급" not in df_view.columns:
+    if "리스크등급" not in df_view.columns or len(df_view) > STYLE_RISK_MAX_ROWS:
         return df_view
 
-    def _row_style(row):
-        level = row.get("리스크등급", "")
-        if level == "HIGH":
-            bg = "#fee2e2"
-        elif level == "MEDIUM":
-            bg = "#fef3c7"
-        else:
-            bg = "#e0f2fe"
-        return [f"background-color: {bg};"] * len(row)
+    # 행별 배경색을 np.select 로 한 번에 계산 → 컬럼 단위(axis=0)로 같은 배열 재사용
+    risk = df_view["리스크등급"]
+    colors = np.select(
+        [(risk == "HIGH").to_numpy(), (risk == "MEDIUM").to_numpy()],
+        ["background-color: #fee2e2;", "background-color: #fef3c7;"],
+        default="background-color: #e0f2fe;",
+    )
 
-    return df_view.style.apply(_row_style, axis=1)
+    return df_view.style.apply(lambda _col: colors, axis=0)
 
 # ==============================
 # 9. 사이드바 글로벌 필터
 # ==============================
 st.sidebar.title("🔧 글로벌 필터")
 
+@st.cache_data
+def voc_date_bounds(path: str, today: date) -> tuple[date, date] | None:
+    """날짜 필터 최소/최대 접수일 (원본 파일 단위 캐시 → rerun 마다 min/max 스캔 생략)."""
+    voc, _, _ = build_enriched(path, today)
+    if "접수일시" not in voc.columns or not voc["접수일시"].notna().any():
+        return None
+    return voc["접수일시"].min().date(), voc["접수일시"].max().date()
+
+
 # 날짜 필터
-if "접수일시" in df_voc.columns and df_voc["접수일시"].notna().any():
-    min_d = df_voc["접수일시"].min().date()
-    max_d = df_voc["접수일시"].max().date()
+date_bounds = voc_date_bounds(MERGED_PATH, today)
+if date_bounds is not None:
+    min_d, max_d = date_bounds
     dr = st.sidebar.date_input(
         "📅 접수일자 범위",
         value=(min_d, max_d),
@@ -898,7 +1262,7 @@ st.sidebar.caption(f"마지막 갱신: {datetime.now().strftime('%Y-%m-%d %H:%M:
 if "담당유형" in df_voc.columns:
     담당유형_list = (
         ["전체"] 
-        + sorted(df_voc["담당유형"].dropna().astype(str).unique().tolist())
+        + category_options(df_voc["담당유형"])
     )
     sel_mgr_type = st.sidebar.selectbox(
         "👤 담당유형 선택",
@@ -917,7 +1281,7 @@ else:
 if "VOC유형중" in df_voc.columns:
     voc_mid_values = (
         ["전체"] 
-        + sorted(df_voc["VOC유형중"].dropna().astype(str).unique().tolist())
+        + category_options(df_voc["VOC유형중"])
     )
     sel_voc_mid = st.sidebar.selectbox(
         "📌 VOC유형중(중분류)",
@@ -932,7 +1296,7 @@ else:
 if "VOC유형소" in df_voc.columns:
     voc_small_values = (
         ["전체"] 
-        + sorted(df_voc["VOC유형소"].dropna().astype(str).unique().tolist())
+        + category_options(df_voc["VOC유형소"])
     )
     sel_voc_small = st.sidebar.selectbox(
         "📌 VOC유형소(소분류)",
@@ -947,7 +1311,7 @@ else:
 if "VOC유형" in df_voc.columns:
     voc_type_values = (
         ["전체"] 
-        + sorted(df_voc["VOC유형"].dropna().astype(str).unique().tolist())
+        + category_options(df_voc["VOC유형"])
     )
     sel_voc_type = st.sidebar.selectbox(
         "📌 VOC유형(대분류)",
@@ -969,91 +1333,194 @@ if st.sidebar.button("🔄 필터 초기화"):
 # ---------------------------------------
 # 🔐 로그인 타입별 데이터 접근 제어
 # ---------------------------------------
-voc_filtered_role = df_voc.copy()
-
+# (이후 단계는 모두 필터/조회만 하므로 방어적 copy 없이 참조)
+# 역할 조건은 별도 슬라이스 없이 글로벌 필터 mask 에 함께 결합
 # ➤ 일반 사용자: 본인 담당 데이터만
-if LOGIN_TYPE == "user":
-    voc_filtered_role = voc_filtered_role[
-        voc_filtered_role["구역담당자_통합"].astype(str) == LOGIN_USER
-    ]
+role_user = LOGIN_USER if LOGIN_TYPE == "user" else None
 
 # ➤ 중간관리자: 본인 지사 전체 데이터
-elif LOGIN_TYPE == "branch_admin":
-    branch = st.session_state.get("login_branch", "")
-    voc_filtered_role = voc_filtered_role[
-        voc_filtered_role["관리지사"].astype(str) == branch
-    ]
+role_branch = (
+    st.session_state.get("login_branch", "") if LOGIN_TYPE == "branch_admin" else None
+)
 
 # ➤ 최고관리자(admin): 모든 데이터 접근 가능
 
 # 이후 글로벌 필터 적용
-voc_filtered_global = voc_filtered_role.copy()
+# 필터에 쓰이는 컬럼만 담은 좁은 프레임 (마스크 계산/캐시 해시는 이 프레임 기준)
+VOC_HOT_COLS = [
+    "계약번호_정제",
+    "관리지사",
+    "리스크등급",
+    "매칭여부",
+    "_matched",
+    "월정료_수치",
+    "접수일시",
+    "구역담당자_통합",
+]
 
-# 날짜 필터
-if dr and isinstance(dr, tuple) and len(dr) == 2:
-    start_d, end_d = dr
-    voc_filtered_global = voc_filtered_global[
-        (voc_filtered_global["접수일시"] >= pd.to_datetime(start_d))
-        & (voc_filtered_global["접수일시"] < pd.to_datetime(end_d) + pd.Timedelta(days=1))
-    ]
+FEE_BAND_RANGES = {
+    "10만 이하": (0, 100000),
+    "10만~30만": (100000, 300000),
+    "30만 이상": (300000, None),
+}
 
-# 지사 필터
-if "전체" not in sel_branches:
-    voc_filtered_global = voc_filtered_global[
-        voc_filtered_global["관리지사"].isin(sel_branches)
-    ]
 
-# 리스크 필터
-if sel_risk and "리스크등급" in voc_filtered_global.columns:
-    voc_filtered_global = voc_filtered_global[
-        voc_filtered_global["리스크등급"].isin(sel_risk)
-    ]
+@st.cache_data(show_spinner=False, max_entries=32)
+def apply_global_filters(
+    voc_hot: pd.DataFrame,
+    date_range: tuple | None,
+    branches: tuple,
+    risks: tuple,
+    matches: tuple,
+    fee_band: str,
+    fee_range: tuple[int, int],
+    use_fee: bool,
+    login_user: str | None = None,
+    login_branch: str | None = None,
+) -> pd.Index:
+    """
+    사이드바 필터 조합을 하나의 boolean mask 로 묶어 한 번에 적용 (필터 튜플별 캐시).
+    반환: 조건을 만족하는 행의 index (표시용 전체 컬럼은 호출측에서 .loc 로 결합)
+    """
+    # 날짜 필터 (df_voc 는 접수일시 오름차순 정렬 상태 → searchsorted 로 구간만 잘라냄)
+    if date_range and len(date_range) == 2:
+        start_d, end_d = date_range
+        start_ns = np.datetime64(start_d, "ns")
+        end_ns = np.datetime64(end_d, "ns") + np.timedelta64(1, "D")
+        dt_vals = voc_hot["접수일시"].to_numpy(dtype="datetime64[ns]")
+        lo, hi = np.searchsorted(dt_vals, [start_ns, end_ns], side="left")
+        voc_hot = voc_hot.iloc[lo:hi]
+
+    mask = np.ones(len(voc_hot), dtype=bool)
+
+    # 지사 필터
+    if "전체" not in branches:
+        mask &= voc_hot["관리지사"].isin(branches).to_numpy()
+
+    # 리스크 필터
+    if risks and "리스크등급" in voc_hot.columns:
+        mask &= voc_hot["리스크등급"].isin(risks).to_numpy()
+
+    # 매칭여부 필터 (boolean 플래그 기준, 둘 다 선택 시 통과)
+    if matches and "_matched" in voc_hot.columns:
+        matched = voc_hot["_matched"].to_numpy()
+        if "매칭(O)" not in matches:
+            mask &= ~matched
+        if "비매칭(X)" not in matches:
+            mask &= matched
+
+    # 💰 월정료 필터 (라디오 구간 + 슬라이더 만원 → 원 단위)
+    if use_fee and "월정료_수치" in voc_hot.columns:
+        fee = voc_hot["월정료_수치"].fillna(-1).to_numpy()
+        band = FEE_BAND_RANGES.get(fee_band)
+        if band is not None:
+            lo, hi = band
+            mask &= fee >= lo
+            if hi is not None:
+                mask &= fee < hi
+        mask &= (fee >= fee_range[0] * 10000) & (fee <= fee_range[1] * 10000)
+
+    # 로그인 타입별 접근 제한 (사용자: 본인 담당 / 중간관리자: 본인 지사)
+    if login_user is not None and "구역담당자_통합" in voc_hot.columns:
+        mask &= (voc_hot["구역담당자_통합"] == str(login_user)).to_numpy()
+    if login_branch is not None:
+        mask &= (voc_hot["관리지사"] == login_branch).to_numpy()
+
+    # 행 순서는 원본 파일 순서로 복원 (df_voc 의 접수일시 정렬은 구간 검색용 내부 순서)
+    return voc_hot.index[mask].sort_values()
+
+
+voc_hot = df_voc[[c for c in VOC_HOT_COLS if c in df_voc.columns]]
+global_filter_idx = apply_global_filters(
+    voc_hot,
+    tuple(dr) if isinstance(dr, tuple) else None,
+    tuple(sel_branches),
+    tuple(sel_risk),
+    tuple(sel_match),
+    sel_fee_band_radio,
+    (fee_slider_min, fee_slider_max),
+    fee_raw_col is not None,
+    role_user,
+    role_branch,
+)
+voc_filtered_global = df_voc.loc[global_filter_idx]
 
-# 매칭여부 필터
-if sel_match and "매칭여부" in voc_filtered_global.columns:
-    voc_filtered_global = voc_filtered_global[
-        voc_filtered_global["매칭여부"].isin(sel_match)
-    ]
+# 비매칭 데이터
+unmatched_global = voc_filtered_global[~voc_filtered_global["_matched"]]
 
-# 💰 월정료 필터 (라디오 + 슬라이더)
-if fee_raw_col is not None and "월정료_수치" in voc_filtered_global.columns:
-    fee_series = voc_filtered_global["월정료_수치"].fillna(-1)
+# ------------------------------------------------
+# 🔹 탭별 지사/담당자/검색 필터 (필터 튜플별 캐시)
+# ------------------------------------------------
+TAB_FILTER_COLS = [
+    "계약번호_정제",
+    "관리지사",
+    "구역담당자_통합",
+    "_matched",
+    "상호",
+    "설치주소_표시",
+]
 
-    # ① 라디오 구간 필터
-    if sel_fee_band_radio == "10만 이하":
-        voc_filtered_global = voc_filtered_global[
-            (fee_series >= 0) & (fee_series < 100000)
-        ]
-    elif sel_fee_band_radio == "10만~30만":
-        voc_filtered_global = voc_filtered_global[
-            (fee_series >= 100000) & (fee_series < 300000)
-        ]
-    elif sel_fee_band_radio == "30만 이상":
-        voc_filtered_global = voc_filtered_global[
-            (fee_series >= 300000)
-        ]
-    # "전체"는 패스
 
-    # ② 슬라이더 추가 정밀 필터 (만원 → 원 단위 변환)
-    slider_min_won = fee_slider_min * 10000
-    slider_max_won = fee_slider_max * 10000
+@st.cache_data
+def apply_tab_filters(
+    tab_hot: pd.DataFrame,
+    match: str = "전체",
+    branch: str = "전체",
+    mgr: str = "전체",
+    q_cn: str = "",
+    q_name: str = "",
+    q_addr: str = "",
+) -> pd.Index:
+    """
+    탭 내부 라디오/검색 조건을 하나의 mask 로 적용 (위젯 상태가 같으면 캐시 재사용).
+    반환: 조건을 만족하는 행의 index
+    """
+    mask = np.ones(len(tab_hot), dtype=bool)
+
+    if match == "매칭(O)":
+        mask &= tab_hot["_matched"].to_numpy()
+    elif match == "비매칭(X)":
+        mask &= ~tab_hot["_matched"].to_numpy()
 
-    fee_series2 = voc_filtered_global["월정료_수치"].fillna(-1)
-    voc_filtered_global = voc_filtered_global[
-        (fee_series2 >= slider_min_won) & (fee_series2 <= slider_max_won)
-    ]
+    if branch != "전체":
+        mask &= (tab_hot["관리지사"] == branch).to_numpy()
+    if mgr != "전체":
+        mask &= (tab_hot["구역담당자_통합"] == mgr).to_numpy()
 
-# 로그인 타입별 접근 제한 (사용자일 경우 한 번 더 안전하게)
-if LOGIN_TYPE == "user":
-    if "구역담당자_통합" in voc_filtered_global.columns:
-        voc_filtered_global = voc_filtered_global[
-            voc_filtered_global["구역담당자_통합"].astype(str) == str(LOGIN_USER)
-        ]
+    # 부분 검색 (대상 컬럼이 이미 문자열 dtype 이므로 astype(str) 불필요)
+    # 공백만 입력된 검색어는 전체 일치이므로 스캔 자체를 생략
+    terms = []
+    for col, q in (("계약번호_정제", q_cn), ("상호", q_name), ("설치주소_표시", q_addr)):
+        q = q.strip() if q else ""
+        if q and col in tab_hot.columns:
+            terms.append((col, q))
+    if terms:
+        mask &= contains_all_mask(tab_hot, terms)
 
-# 비매칭 데이터
-unmatched_global = voc_filtered_global[
-    voc_filtered_global["매칭여부"] == "비매칭(X)"
-].copy()
+    return tab_hot.index[mask]
+
+
+@st.cache_data
+def tab_branch_options(tab_hot: pd.DataFrame, match: str = "전체") -> list[str]:
+    """탭 지사 라디오 목록 (매칭여부 선택별 캐시)."""
+    sub = tab_hot.loc[apply_tab_filters(tab_hot, match=match)]
+    return ["전체"] + sort_branch(sub["관리지사"].dropna().unique())
+
+
+@st.cache_data
+def tab_manager_options(
+    tab_hot: pd.DataFrame, match: str = "전체", branch: str = "전체"
+) -> list[str]:
+    """탭 담당자 라디오 목록 (매칭여부 · 지사 선택별 캐시)."""
+    if "구역담당자_통합" not in tab_hot.columns:
+        return ["전체"]
+    sub = tab_hot.loc[apply_tab_filters(tab_hot, match=match, branch=branch)]
+    return ["전체"] + sort_manager(sub["구역담당자_통합"])
+
+
+tab_hot = voc_filtered_global[
+    [c for c in TAB_FILTER_COLS if c in voc_filtered_global.columns]
+]
 
 # ==============================
 # 10. 상단 KPI
@@ -1062,18 +1529,25 @@ st.write("")
 st.markdown("## 📊 해지 VOC 종합 대시보드")
 
 total_voc_rows = len(voc_filtered_global)
-unique_contracts = voc_filtered_global["계약번호_정제"].nunique()
-unmatched_contracts = unmatched_global["계약번호_정제"].nunique()
-matched_contracts = (
-    voc_filtered_global[voc_filtered_global["매칭여부"] == "매칭(O)"]["계약번호_정제"]
-    .nunique()
+unique_contracts = voc_filtered_global["_cn_code"].nunique()
+unmatched_contracts = unmatched_global["_cn_code"].nunique()
+matched_contracts = voc_filtered_global.loc[
+    voc_filtered_global["_matched"], "_cn_code"
+].nunique()
+
+# KPI 4종을 하나의 HTML 블록으로 묶어 한 번에 렌더링
+kpi_items = [
+    ("VOC 접수건수(행)", total_voc_rows),
+    ("VOC 계약 수(유니크)", unique_contracts),
+    ("비매칭(X) 계약 수", unmatched_contracts),
+    ("매칭(O) 계약 수", matched_contracts),
+]
+kpi_html = "".join(
+    f"<div class='kpi-card'><div class='kpi-label'>{label}</div>"
+    f"<div class='kpi-value'>{value:,}</div></div>"
+    for label, value in kpi_items
 )
-
-k1, k2, k3, k4 = st.columns(4)
-k1.metric("VOC 접수건수(행)", f"{total_voc_rows:,}")
-k2.metric("VOC 계약 수(유니크)", f"{unique_contracts:,}")
-k3.metric("비매칭(X) 계약 수", f"{unmatched_contracts:,}")
-k4.metric("매칭(O) 계약 수", f"{matched_contracts:,}")
+st.markdown(f"<div class='kpi-row'>{kpi_html}</div>", unsafe_allow_html=True)
 
 st.markdown("---")
 
@@ -1095,6 +1569,26 @@ tab_viz, tab_all, tab_unmatched, tab_drill, tab_filter, tab_alert, tab_branch_ad
 # ----------------------------------------------------
 # 🏢 지사 관리자 전용 대시보드
 # ----------------------------------------------------
+@st.cache_data
+def branch_admin_stats(path: str, today: date, branch: str):
+    """지사별 VOC 건수 · 비매칭 계약수 · 리스크 분포 · 비매칭 행 index (지사별 캐시)."""
+    voc, _, _ = build_enriched(path, today)
+    df_branch = voc[voc["관리지사"] == branch]
+    df_unmatched = df_branch[~df_branch["_matched"]]
+    rc = (
+        df_unmatched["리스크등급"]
+        .value_counts()
+        .reindex(RISK_LEVELS)
+        .fillna(0)
+    )
+    return (
+        len(df_branch),
+        df_unmatched["_cn_code"].nunique(),
+        rc,
+        df_unmatched.index.sort_values(),  # 원본 파일 순서
+    )
+
+
 with tab_branch_admin_report:
     if LOGIN_TYPE != "branch_admin":
         st.info("이 탭은 지사 관리자만 접근할 수 있습니다.")
@@ -1102,27 +1596,55 @@ with tab_branch_admin_report:
         branch = st.session_state.get("login_branch", "")
         st.subheader(f"🏢 {branch} 지사 관리자 대시보드")
 
-        df_branch = df_voc[df_voc["관리지사"] == branch]
+        n_branch_voc, n_branch_unmatched, rc, unmatched_idx = branch_admin_stats(
+            MERGED_PATH, today, branch
+        )
+        df_branch_unmatched = df_voc.loc[unmatched_idx]
 
-        st.metric("총 VOC 건수", len(df_branch))
-        st.metric("비매칭 계약 수", df_branch[df_branch["매칭여부"] == "비매칭(X)"]["계약번호_정제"].nunique())
+        st.metric("총 VOC 건수", n_branch_voc)
+        st.metric("비매칭 계약 수", n_branch_unmatched)
 
         st.markdown("### 🔥 리스크별 비매칭 구조")
-        rc = (
-            df_branch[df_branch["매칭여부"] == "비매칭(X)"]["리스크등급"]
-            .value_counts()
-            .reindex(["HIGH","MEDIUM","LOW"])
-            .fillna(0)
-        )
         st.bar_chart(rc)
 
         st.markdown("### 📋 지사 전체 비매칭 리스트")
         st.dataframe(
-            df_branch[df_branch["매칭여부"]=="비매칭(X)"][display_cols],
+            df_branch_unmatched[display_cols],
             use_container_width=True,
             height=450,
         )
 
+# ------------------------------------------------
+# 🔹 Plotly Figure 생성 (집계된 소형 DataFrame 기준 캐시)
+# ------------------------------------------------
+@st.cache_data
+def stacked_bar_figure(df: pd.DataFrame, x: str, y_cols: list[str], height: int):
+    fig = px.bar(
+        df,
+        x=x,
+        y=y_cols,
+        barmode="stack",
+        text_auto=True,
+        height=height,
+    )
+    fig.update_layout(
+        margin=dict(l=40, r=20, t=40, b=40),
+    )
+    return fig
+
+
+@st.cache_data
+def trend_line_figure(trend: pd.DataFrame, x: str, y: str, height: int):
+    fig = px.line(trend, x=x, y=y, markers=True)
+    fig.update_layout(height=height)
+    return fig
+
+
+@st.cache_data
+def donut_figure(df: pd.DataFrame, names: str, values: str):
+    return px.pie(df, names=names, values=values, hole=0.48)
+
+
 # ------------------------------------------------
 # 🔹 적층 세로 막대그래프 (Plotly)
 # ------------------------------------------------
@@ -1138,29 +1660,75 @@ def force_stacked_bar(df: pd.DataFrame, x: str, y_cols: list[str], height: int =
         return
 
     if HAS_PLOTLY:
-        fig = px.bar(
-            df,
-            x=x,
-            y=y_cols,
-            barmode="stack",
-            text_auto=True,
-            height=height,
-        )
-        fig.update_layout(
-            margin=dict(l=40, r=20, t=40, b=40),
-        )
+        fig = stacked_bar_figure(df, x, y_cols, height)
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("Plotly가 설치되어야 적층 막대그래프를 표시할 수 있습니다.")
 
 
+# ------------------------------------------------
+# 🔹 리스크 적층용 집계 (캐시)
+# ------------------------------------------------
+@st.cache_data
+def risk_contract_pivot(df_in: pd.DataFrame, index_col: str) -> pd.DataFrame:
+    """index_col × 리스크등급 별 유니크 계약수 피벗 (한 번의 groupby + unstack)."""
+    return (
+        df_in.groupby([index_col, "리스크등급"], observed=True)["_cn_code"]
+        .nunique()
+        .unstack(fill_value=0)
+    )
+
+
+@st.cache_data
+def viz_aggregates(df_in: pd.DataFrame):
+    """TAB VIZ 분포/추이/Heatmap/Treemap 집계를 한 번에 계산 (필터 결과가 같으면 캐시 재사용)."""
+    rc = (
+        df_in["리스크등급"]
+        .value_counts()
+        .reindex(RISK_LEVELS)
+        .fillna(0)
+        .astype(int)
+    )
+
+    trend = None
+    if df_in["접수일시"].notna().any():
+        trend = (
+            df_in.assign(접수일=df_in["접수일시"].dt.date)
+            .groupby("접수일")["_cn_code"].nunique()
+            .reset_index(name="계약번호_정제")
+        )
+
+    # Heatmap · 산점도가 같은 지사 × 담당자 집계를 공유
+    mgr_keys = ["관리지사", "구역담당자_통합"]
+    mgr_counts = (
+        df_in.groupby(mgr_keys, observed=True)["_cn_code"]
+        .nunique()
+        .reset_index(name="계약수")
+    )
+    # 축/범례 순서는 category 순서가 아닌 지사 · 담당자 가나다순 (Heatmap 축 · 산점도 trace 순서 유지)
+    mgr_counts[mgr_keys] = mgr_counts[mgr_keys].astype(str)
+    mgr_counts = mgr_counts.sort_values(mgr_keys, ignore_index=True)
+
+    tree_df = (
+        df_in.groupby(["관리지사", "구역담당자_통합", "리스크등급"], observed=True)
+        ["_cn_code"]
+        .nunique()
+        .reset_index(name="계약수")
+    )
+    # treemap 경로 컬럼은 category 대신 문자열로 전달
+    tree_path = ["관리지사", "구역담당자_통합", "리스크등급"]
+    tree_df[tree_path] = tree_df[tree_path].astype(str)
+
+    return rc, trend, mgr_counts, tree_df
+
+
 # ----------------------------------------------------
 # TAB VIZ — 지사 / 담당자 시각화 (완전한 최신 통합버전)
 # ----------------------------------------------------
 with tab_viz:
 
     # TAB VIZ는 항상 글로벌 필터 이후 데이터 기반
-    viz_base = unmatched_global.copy()
+    viz_base = unmatched_global
 
     st.subheader("📊 지사 / 담당자별 비매칭 리스크 현황")
 
@@ -1190,7 +1758,7 @@ with tab_viz:
     # -----------------------------
     # 지사 선택
     # -----------------------------
-    branch_options = ["전체"] + sort_branch(viz_base["관리지사"].dropna().unique())
+    branch_options = tab_branch_options(tab_hot, "비매칭(X)")
     sel_branch = colA.selectbox(
         "🏢 지사 선택",
         options=branch_options,
@@ -1201,21 +1769,9 @@ with tab_viz:
     # -----------------------------
     # 담당자 선택
     # -----------------------------
-    temp_mgr = viz_base.copy()
-    if sel_branch != "전체":
-        temp_mgr = temp_mgr[temp_mgr["관리지사"] == sel_branch]
-
-    mgr_list = sorted(
-        temp_mgr["구역담당자_통합"]
-        .dropna()
-        .astype(str)
-        .unique()
-        .tolist()
-    )
-
     sel_mgr = colB.selectbox(
         "👤 담당자 선택",
-        options=["전체"] + mgr_list,
+        options=tab_manager_options(tab_hot, "비매칭(X)", sel_branch),
         index=0,
         key="viz_mgr_filter"
     )
@@ -1223,33 +1779,24 @@ with tab_viz:
     # -----------------------------
     # 필터 적용
     # -----------------------------
-    viz_filtered = viz_base.copy()
-
-    if sel_branch != "전체":
-        viz_filtered = viz_filtered[viz_filtered["관리지사"] == sel_branch]
-
-    if sel_mgr != "전체":
-        viz_filtered = viz_filtered[viz_filtered["구역담당자_통합"].astype(str) == sel_mgr]
+    viz_filtered = viz_base.loc[
+        apply_tab_filters(tab_hot, "비매칭(X)", sel_branch, sel_mgr)
+    ]
 
     if viz_filtered.empty:
         st.info("선택된 조건에 맞는 데이터가 없습니다.")
         st.stop()
 
-    st.success(f"📌 필터 적용된 계약 수: {viz_filtered['계약번호_정제'].nunique():,} 건")
+    st.success(f"📌 필터 적용된 계약 수: {viz_filtered['_cn_code'].nunique():,} 건")
 
     # ======================================================
     # 1) 지사별 비매칭 적층 막대
     # ======================================================
     st.markdown("### 🧱 지사별 비매칭 계약수 (리스크 적층)")
 
-    df_branch = (
-        viz_filtered.groupby(["관리지사", "리스크등급"])["계약번호_정제"]
-        .nunique()
-        .reset_index(name="계약수")
-    )
+    pivot_branch = risk_contract_pivot(viz_filtered, "관리지사")
 
-    if not df_branch.empty:
-        pivot_branch = df_branch.pivot(index="관리지사", columns="리스크등급", values="계약수").fillna(0)
+    if not pivot_branch.empty:
         pivot_branch = pivot_branch.reindex(BRANCH_ORDER).fillna(0)
 
         cols_branch = [c for c in ["HIGH", "MEDIUM", "LOW"] if c in pivot_branch.columns]
@@ -1268,15 +1815,9 @@ with tab_viz:
     # ======================================================
     st.markdown("### 👤 담당자별 TOP 15 (유니크 계약 · 리스크 적층)")
 
-    df_mgr = (
-        viz_filtered.groupby(["구역담당자_통합", "리스크등급"])["계약번호_정제"]
-        .nunique()
-        .reset_index(name="계약수")
-    )
-
-    if not df_mgr.empty:
-        pivot_mgr = df_mgr.pivot(index="구역담당자_통합", columns="리스크등급", values="계약수").fillna(0)
+    pivot_mgr = risk_contract_pivot(viz_filtered, "구역담당자_통합")
 
+    if not pivot_mgr.empty:
         cols_mgr = [c for c in ["HIGH", "MEDIUM", "LOW"] if c in pivot_mgr.columns]
         pivot_mgr["총"] = pivot_mgr.sum(axis=1)
         pivot_mgr = pivot_mgr.sort_values("총", ascending=False).head(15).drop(columns=["총"])
@@ -1295,12 +1836,7 @@ with tab_viz:
     # ======================================================
     st.markdown("### 🔥 전체 리스크 등급 분포")
 
-    rc = (
-        viz_filtered["리스크등급"]
-        .value_counts()
-        .reindex(["HIGH", "MEDIUM", "LOW"])
-        .fillna(0)
-    )
+    rc, trend, mgr_counts, tree_df = viz_aggregates(viz_filtered)
 
     risk_df = pd.DataFrame({
         "구분": ["전체"],
@@ -1321,15 +1857,8 @@ with tab_viz:
     # ======================================================
     st.markdown("### 📈 일별 비매칭 추이")
 
-    if viz_filtered["접수일시"].notna().any():
-        trend = (
-            viz_filtered.assign(접수일=viz_filtered["접수일시"].dt.date)
-            .groupby("접수일")["계약번호_정제"].nunique()
-            .reset_index()
-        )
-
-        fig_t = px.line(trend, x="접수일", y="계약번호_정제", markers=True)
-        fig_t.update_layout(height=260)
+    if trend is not None:
+        fig_t = trend_line_figure(trend, "접수일", "계약번호_정제", 260)
         st.plotly_chart(fig_t, use_container_width=True)
 
     # ======================================================
@@ -1358,14 +1887,8 @@ with tab_viz:
     # ======================================================
     st.markdown("### 🔥 지사 × 담당자 Heatmap")
 
-    df_heat = (
-        viz_filtered.groupby(["관리지사", "구역담당자_통합"])["계약번호_정제"]
-        .nunique()
-        .reset_index(name="계약수")
-    )
-
-    if not df_heat.empty:
-        heat_pivot = df_heat.pivot(index="관리지사", columns="구역담당자_통합", values="계약수").fillna(0)
+    if not mgr_counts.empty:
+        heat_pivot = mgr_counts.pivot(index="관리지사", columns="구역담당자_통합", values="계약수").fillna(0)
 
         fig_h = px.imshow(
             heat_pivot,
@@ -1387,15 +1910,8 @@ with tab_viz:
     # 7-1 산점도
     st.markdown("### 🔹 산점도 (지사 · 담당자 · 계약규모)")
 
-    scat = (
-        viz_filtered.groupby(["관리지사", "구역담당자_통합"])
-        ["계약번호_정제"]
-        .nunique()
-        .reset_index(name="계약수")
-    )
-
     fig_s = px.scatter(
-        scat,
+        mgr_counts,
         x="관리지사",
         y="구역담당자_통합",
         size="계약수",
@@ -1407,13 +1923,6 @@ with tab_viz:
     # 7-2 트리맵
     st.markdown("### 🔹 Treemap (지사 → 담당자 → 리스크)")
 
-    tree_df = (
-        viz_filtered.groupby(["관리지사", "구역담당자_통합", "리스크등급"])
-        ["계약번호_정제"]
-        .nunique()
-        .reset_index(name="계약수")
-    )
-
     fig_tmap = px.treemap(
         tree_df,
         path=["관리지사", "구역담당자_통합", "리스크등급"],
@@ -1440,22 +1949,18 @@ with tab_viz:
     # 7-4 도넛
     st.markdown("### 🔸 리스크 등급 비율 (도넛)")
 
-    rc_d = viz_filtered["리스크등급"].value_counts().reset_index()
+    # 건수 0 인 등급은 제외 (value_counts 기반 기존 도넛/막대와 동일한 항목만 표시)
+    rc_d = rc[rc > 0].sort_values(ascending=False, kind="stable").reset_index()
     rc_d.columns = ["리스크등급", "건수"]
 
-    fig_pie = px.pie(
-        rc_d, names="리스크등급", values="건수", hole=0.48
-    )
+    fig_pie = donut_figure(rc_d, "리스크등급", "건수")
     st.plotly_chart(fig_pie, use_container_width=True)
 
     # 7-5 AI 기반 위험군 분석
     st.markdown("### 🤖 AI 기반 VOC 위험군 분석")
 
-    ai_df = viz_filtered.copy()
-    ai_df["AI_리스크"] = ai_df["리스크등급"]  # placeholder
-
-    ai_sum = ai_df["AI_리스크"].value_counts().reset_index()
-    ai_sum.columns = ["리스크", "건수"]
+    # placeholder: AI 리스크 = 리스크등급 → 캐시된 등급 분포 재사용
+    ai_sum = rc_d.rename(columns={"리스크등급": "리스크"})
 
     fig_ai = px.bar(ai_sum, x="리스크", y="건수", text_auto=True)
     st.plotly_chart(fig_ai, use_container_width=True)
@@ -1468,9 +1973,7 @@ with tab_all:
 
     row1_col1, row1_col2 = st.columns([2, 3])
 
-    branches_for_tab1 = ["전체"] + sort_branch(
-        voc_filtered_global["관리지사"].dropna().unique()
-    )
+    branches_for_tab1 = tab_branch_options(tab_hot)
     selected_branch_tab1 = row1_col1.radio(
         "지사 선택",
         options=branches_for_tab1,
@@ -1478,24 +1981,7 @@ with tab_all:
         key="tab1_branch_radio",
     )
 
-    temp_for_mgr = voc_filtered_global.copy()
-    if selected_branch_tab1 != "전체":
-        temp_for_mgr = temp_for_mgr[
-            temp_for_mgr["관리지사"] == selected_branch_tab1
-        ]
-
-    mgr_options_tab1 = (
-        ["전체"]
-        + sorted(
-            temp_for_mgr["구역담당자_통합"]
-            .dropna()
-            .astype(str)
-            .unique()
-            .tolist()
-        )
-        if "구역담당자_통합" in temp_for_mgr.columns
-        else ["전체"]
-    )
+    mgr_options_tab1 = tab_manager_options(tab_hot, branch=selected_branch_tab1)
 
     selected_mgr_tab1 = row1_col2.radio(
         "담당자 선택",
@@ -1509,44 +1995,21 @@ with tab_all:
     q_name = s2.text_input("상호 검색(부분)", key="tab1_name")
     q_addr = s3.text_input("주소 검색(부분)", key="tab1_addr")
 
-    temp = voc_filtered_global.copy()
-
-    if selected_branch_tab1 != "전체":
-        temp = temp[temp["관리지사"] == selected_branch_tab1]
-    if selected_mgr_tab1 != "전체":
-        temp = temp[temp["구역담당자_통합"].astype(str) == selected_mgr_tab1]
-
-    if q_cn:
-        temp = temp[
-            temp["계약번호_정제"].astype(str).str.contains(q_cn.strip())
-        ]
-    if q_name and "상호" in temp.columns:
-        temp = temp[
-            temp["상호"].astype(str).str.contains(q_name.strip())
-        ]
-    if q_addr:
-        cond = None
-        if "설치주소_표시" in temp.columns:
-            cond = temp["설치주소_표시"].astype(str).str.contains(q_addr.strip())
-        else:
-            for col in address_cols:
-                if col in temp.columns:
-                    series_cond = temp[col].astype(str).str.contains(q_addr.strip())
-                    if cond is None:
-                        cond = series_cond
-                    else:
-                        cond = cond | series_cond
-        if cond is not None:
-            temp = temp[cond]
+    temp = voc_filtered_global.loc[
+        apply_tab_filters(
+            tab_hot,
+            branch=selected_branch_tab1,
+            mgr=selected_mgr_tab1,
+            q_cn=q_cn,
+            q_name=q_name,
+            q_addr=q_addr,
+        )
+    ]
 
     if temp.empty:
         st.info("조건에 맞는 VOC 데이터가 없습니다.")
     else:
-        temp_sorted = temp.sort_values("접수일시", ascending=False)
-        grp = temp_sorted.groupby("계약번호_정제")
-        idx_latest = grp["접수일시"].idxmax()
-        df_summary = temp_sorted.loc[idx_latest].copy()
-        df_summary["접수건수"] = grp.size().reindex(df_summary["계약번호_정제"]).values
+        df_summary = latest_per_contract(temp)
 
         summary_cols = [
             "계약번호_정제",
@@ -1568,9 +2031,10 @@ with tab_all:
 
         st.markdown(f"📌 표시 계약 수: **{len(df_summary):,} 건**")
         st.dataframe(
-            style_risk(df_summary[summary_cols]),
+            df_summary[summary_cols],
             use_container_width=True,
             height=480,
+            column_config=SUMMARY_COLUMN_CONFIG,
         )
 
 # ----------------------------------------------------
@@ -1593,9 +2057,7 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
         with st.expander("🔎 지사 / 담당자 / 검색 필터", expanded=False):
             u_col1, u_col2 = st.columns([2, 3])
 
-            branches_u = ["전체"] + sort_branch(
-                unmatched_global["관리지사"].dropna().unique()
-            )
+            branches_u = tab_branch_options(tab_hot, "비매칭(X)")
             selected_branch_u = u_col1.radio(
                 "지사 선택",
                 options=branches_u,
@@ -1603,23 +2065,8 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
                 key="tab2_branch_radio",
             )
 
-            temp_u_for_mgr = unmatched_global.copy()
-            if selected_branch_u != "전체":
-                temp_u_for_mgr = temp_u_for_mgr[
-                    temp_u_for_mgr["관리지사"] == selected_branch_u
-                ]
-
-            mgr_options_u = (
-                ["전체"]
-                + sorted(
-                    temp_u_for_mgr["구역담당자_통합"]
-                    .dropna()
-                    .astype(str)
-                    .unique()
-                    .tolist()
-                )
-                if "구역담당자_통합" in temp_u_for_mgr.columns
-                else ["전체"]
+            mgr_options_u = tab_manager_options(
+                tab_hot, "비매칭(X)", selected_branch_u
             )
 
             selected_mgr_u = u_col2.radio(
@@ -1634,33 +2081,21 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
             uq_name = us2.text_input("상호 검색(부분)", key="tab2_name")
 
         # ▶ 필터 적용
-        temp_u = unmatched_global.copy()
-        
-        if selected_branch_u != "전체":
-            temp_u = temp_u[temp_u["관리지사"] == selected_branch_u]
-            
-        if selected_mgr_u != "전체":
-            temp_u = temp_u[temp_u["구역담당자_통합"].astype(str) == selected_mgr_u]
-
-        if uq_cn:
-            temp_u = temp_u[
-                temp_u["계약번호_정제"].astype(str).str.contains(uq_cn.strip())
-            ]
-        if uq_name and "상호" in temp_u.columns:
-            temp_u = temp_u[
-                temp_u["상호"].astype(str).str.contains(uq_name.strip())
-            ]
+        temp_u = unmatched_global.loc[
+            apply_tab_filters(
+                tab_hot,
+                match="비매칭(X)",
+                branch=selected_branch_u,
+                mgr=selected_mgr_u,
+                q_cn=uq_cn,
+                q_name=uq_name,
+            )
+        ]
 
         if temp_u.empty:
             st.info("조건에 맞는 해지방어 활동시설(비매칭) 계약이 없습니다.")
         else:
-            temp_u_sorted = temp_u.sort_values("접수일시", ascending=False)
-            grp_u = temp_u_sorted.groupby("계약번호_정제")
-            idx_latest_u = grp_u["접수일시"].idxmax()
-            df_u_summary = temp_u_sorted.loc[idx_latest_u].copy()
-            df_u_summary["접수건수"] = grp_u.size().reindex(
-                df_u_summary["계약번호_정제"]
-            ).values
+            df_u_summary = latest_per_contract(temp_u)
 
             summary_cols_u = [
                 "계약번호_정제",
@@ -1706,7 +2141,7 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
             if selected_rows:
                 selected_idx = selected_rows[0]
 
-            u_contract_list = df_u_summary["계약번호_정제"].astype(str).tolist()
+            u_contract_list = df_u_summary["계약번호_정제"].tolist()
             default_index = 0
             if selected_idx is not None and 0 <= selected_idx < len(u_contract_list):
                 default_index = selected_idx + 1  # "(선택)" offset
@@ -1722,9 +2157,8 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
 
             if sel_u_contract != "(선택)":
                 voc_detail = temp_u[
-                    temp_u["계약번호_정제"].astype(str) == sel_u_contract
-                ].copy()
-                voc_detail = voc_detail.sort_values("접수일시", ascending=False)
+                    temp_u["계약번호_정제"] == sel_u_contract
+                ].sort_values("접수일시", ascending=False)
 
                 latest = voc_detail.iloc[0]
                 info_branch = latest.get("관리지사", "")
@@ -1750,7 +2184,7 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
 
             st.download_button(
                 "📥 해지방어 활동시설(비매칭) 원천 VOC 행 다운로드 (CSV)",
-                temp_u.to_csv(index=False).encode("utf-8-sig"),
+                to_csv_bytes(temp_u),
                 file_name="해지방어_활동시설_원천행.csv",
                 mime="text/csv",
             )
@@ -1761,7 +2195,7 @@ with st.expander("ℹ️ 해지방어 활동시설 안내", expanded=True):
 with tab_drill:
     st.subheader("🔍 해지상담대상 활동등록 (계약번호 기준 드릴다운)")
 
-    base_all = voc_filtered_global.copy()
+    base_all = voc_filtered_global
 
     match_choice = st.radio(
         "매칭여부 선택",
@@ -1770,19 +2204,11 @@ with tab_drill:
         key="tab4_match_radio",
     )
 
-    drill_base = base_all.copy()
-    if match_choice == "매칭(O)":
-        drill_base = drill_base[drill_base["매칭여부"] == "매칭(O)"]
-    elif match_choice == "비매칭(X)":
-        drill_base = drill_base[drill_base["매칭여부"] == "비매칭(X)"]
-
     with st.expander("🔎 지사 / 담당자 / 검색 필터", expanded=False):
 
         d1, d2 = st.columns([2, 3])
 
-        branches_d = ["전체"] + sort_branch(
-            drill_base["관리지사"].dropna().unique()
-        )
+        branches_d = tab_branch_options(tab_hot, match_choice)
         sel_branch_d = d1.radio(
             "지사 선택",
             options=branches_d,
@@ -1790,22 +2216,7 @@ with tab_drill:
             key="tab4_branch_radio",
         )
 
-        tmp_mgr_d = drill_base.copy()
-        if sel_branch_d != "전체":
-            tmp_mgr_d = tmp_mgr_d[tmp_mgr_d["관리지사"] == sel_branch_d]
-
-        mgr_options_d = (
-            ["전체"]
-            + sorted(
-                tmp_mgr_d["구역담당자_통합"]
-                .dropna()
-                .astype(str)
-                .unique()
-                .tolist()
-            )
-            if "구역담당자_통합" in tmp_mgr_d.columns
-            else ["전체"]
-        )
+        mgr_options_d = tab_manager_options(tab_hot, match_choice, sel_branch_d)
 
         sel_mgr_d = d2.radio(
             "담당자 선택",
@@ -1818,32 +2229,22 @@ with tab_drill:
         dq_cn = dd1.text_input("계약번호 검색(부분)", key="tab4_cn")
         dq_name = dd2.text_input("상호 검색(부분)", key="tab4_name")
 
-    drill = drill_base.copy()
-    if sel_branch_d != "전체":
-        drill = drill[drill["관리지사"] == sel_branch_d]
-    if sel_mgr_d != "전체":
-        drill = drill[drill["구역담당자_통합"].astype(str) == sel_mgr_d]
-
-    if dq_cn:
-        drill = drill[
-            drill["계약번호_정제"].astype(str).str.contains(dq_cn.strip())
-        ]
-    if dq_name and "상호" in drill.columns:
-        drill = drill[
-            drill["상호"].astype(str).str.contains(dq_name.strip())
-        ]
+    drill = base_all.loc[
+        apply_tab_filters(
+            tab_hot,
+            match=match_choice,
+            branch=sel_branch_d,
+            mgr=sel_mgr_d,
+            q_cn=dq_cn,
+            q_name=dq_name,
+        )
+    ]
 
     if drill.empty:
         st.info("조건에 맞는 계약이 없습니다. 필터를 조정해보세요.")
         sel_cn = None
     else:
-        drill_sorted = drill.sort_values("접수일시", ascending=False)
-        g = drill_sorted.groupby("계약번호_정제")
-        idx_latest_d = g["접수일시"].idxmax()
-        df_d_summary = drill_sorted.loc[idx_latest_d].copy()
-        df_d_summary["접수건수"] = g.size().reindex(
-            df_d_summary["계약번호_정제"]
-        ).values
+        df_d_summary = latest_per_contract(drill)
 
         sum_cols_d = [
             "계약번호_정제",
@@ -1864,21 +2265,28 @@ with tab_drill:
 
         st.markdown("#### 📋 계약 요약 (최신 VOC 기준, 계약번호당 1행)")
         st.dataframe(
-            style_risk(df_d_summary[sum_cols_d]),
+            df_d_summary[sum_cols_d],
             use_container_width=True,
             height=260,
+            column_config=SUMMARY_COLUMN_CONFIG,
         )
 
-        cn_list = df_d_summary["계약번호_정제"].astype(str).tolist()
+        cn_list = df_d_summary["계약번호_정제"].tolist()
+
+        # 선택지 라벨을 한 번에 만들어 두고 format_func 는 dict 조회만 수행
+        n_rows = len(df_d_summary)
+        cn_labels = {
+            cn: f"{cn} | {name} | {branch} | 접수 {int(cnt)}건"
+            for cn, name, branch, cnt in zip(
+                cn_list,
+                df_d_summary["상호"].tolist() if "상호" in df_d_summary.columns else [""] * n_rows,
+                df_d_summary["관리지사"].tolist(),
+                df_d_summary["접수건수"].tolist(),
+            )
+        }
 
         def format_cn(cn_value: str) -> str:
-            row = df_d_summary[
-                df_d_summary["계약번호_정제"].astype(str) == str(cn_value)
-            ].iloc[0]
-            name = row.get("상호", "")
-            branch = row.get("관리지사", "")
-            cnt = row.get("접수건수", 0)
-            return f"{cn_value} | {name} | {branch} | 접수 {int(cnt)}건"
+            return cn_labels.get(cn_value, cn_value)
 
         sel_cn = st.selectbox(
             "상세를 볼 계약 선택",
@@ -1888,14 +2296,9 @@ with tab_drill:
         )
 
         if sel_cn:
-            voc_hist = df_voc[
-                df_voc["계약번호_정제"].astype(str) == str(sel_cn)
-            ].copy()
-            voc_hist = voc_hist.sort_values("접수일시", ascending=False)
-
-            other_hist = df_other[
-                df_other["계약번호_정제"].astype(str) == str(sel_cn)
-            ].copy()
+            voc_hist, other_hist = contract_history(
+                MERGED_PATH, today, sel_cn, df_voc, df_other
+            )
 
             base_info = voc_hist.iloc[0] if not voc_hist.empty else None
 
@@ -1919,11 +2322,13 @@ with tab_drill:
                 m2_2.metric("리스크등급", str(base_info.get("리스크등급", "")))
                 m2_3.metric("매칭여부", str(base_info.get("매칭여부", "")))
 
-                st.caption(f"📍 설치주소: {str(base_info.get('설치주소_표시', ''))}")
+                # 시설 정보 캡션은 한 번의 st.caption 으로 묶어 전송
+                facility_lines = [f"📍 설치주소: {str(base_info.get('설치주소_표시', ''))}"]
                 if fee_raw_col is not None:
-                    st.caption(
+                    facility_lines.append(
                         f"💰 {fee_raw_col}: {str(base_info.get(fee_raw_col, ''))}"
                     )
+                st.caption("  \n".join(facility_lines))
 
                 st.markdown(f"### 🔎 선택된 계약번호: `{sel_cn}`")
 
@@ -1945,11 +2350,13 @@ with tab_drill:
         m2_2.metric("리스크등급", str(base_info.get("리스크등급", "")))
         m2_3.metric("매칭여부", str(base_info.get("매칭여부", "")))
 
-        st.caption(f"📍 설치주소: {str(base_info.get('설치주소_표시', ''))}")
+        # 시설 정보 캡션은 한 번의 st.caption 으로 묶어 전송
+        facility_lines = [f"📍 설치주소: {str(base_info.get('설치주소_표시', ''))}"]
         if fee_raw_col is not None:
-            st.caption(
+            facility_lines.append(
                 f"💰 {fee_raw_col}: {str(base_info.get(fee_raw_col, ''))}"
             )
+        st.caption("  \n".join(facility_lines))
 
         # 🔹 3번: AI 기반 방어 정책 추천 블록
         st.markdown("### 🤖 AI 기반 방어 정책 추천")
@@ -2010,6 +2417,44 @@ with c_right:
         )
 
 
+# ----------------------------------------------------
+# 빠른 활동등록 (fragment → 입력/선택 시 이 영역만 다시 실행)
+# ----------------------------------------------------
+@st.fragment
+def render_quick_register():
+    st.markdown("### ➕ 빠른 활동등록")
+
+    user_rows = unmatched_global
+
+    sel_quick = st.selectbox(
+        "활동등록할 계약 선택",
+        options=["(선택)"] + user_rows["계약번호_정제"].tolist(),
+        key="quick_cn",
+    )
+
+    if sel_quick != "(선택)":
+        row = user_rows[user_rows["계약번호_정제"] == sel_quick].iloc[0]
+        st.write(f"**계약번호:** {sel_quick}")
+        st.write(f"**상호:** {row['상호']}")
+        st.write(f"**설치주소:** {row['설치주소_표시']}")
+
+        quick_content = st.text_area("활동내용 입력", key="quick_content")
+        quick_writer = LOGIN_USER
+        quick_note = st.text_input("비고", key="quick_note")
+
+        if st.button("등록", key="quick_submit"):
+            new_row = {
+                "계약번호_정제": sel_quick,
+                "고객대응내용": quick_content,
+                "등록자": quick_writer,
+                "등록일자": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "비고": quick_note,
+            }
+            append_feedback(FEEDBACK_PATH, new_row)
+            st.success("등록 완료되었습니다.")
+            st.rerun()  # 등록 이력 반영을 위해 앱 전체 재실행
+
+
 # ----------------------------------------------------
 # 글로벌 피드백 이력 & 입력 (선택된 sel_cn 기준)
 # ----------------------------------------------------
@@ -2023,28 +2468,39 @@ if "sel_cn" not in locals() or sel_cn is None:
 else:
     st.caption(f"선택된 계약번호: **{sel_cn}** 기준 처리내역 관리")
 
-    fb_all = st.session_state["feedback_df"]
-    fb_sel = fb_all[fb_all["계약번호_정제"].astype(str) == str(sel_cn)].copy()
+    fb_all = get_feedback_df()
+    fb_pos = feedback_positions(FEEDBACK_PATH, feedback_file_key(FEEDBACK_PATH))
+    fb_sel = fb_all.take(fb_pos.get(sel_cn, EMPTY_POS))
     fb_sel = fb_sel.sort_values("등록일자", ascending=False)
 
     st.markdown("##### 📄 등록된 처리내역")
     if fb_sel.empty:
         st.info("등록된 처리 이력이 없습니다.")
     else:
-        for idx, row in fb_sel.iterrows():
+        # 행별 Series 생성(iterrows) 없이 컬럼 배열을 zip 으로 순회
+        fb_notes = (
+            fb_sel["비고"].to_numpy() if "비고" in fb_sel.columns else [""] * len(fb_sel)
+        )
+        fb_meta_html = [
+            f"<div class='feedback-meta'>등록자: {writer} | 등록일: {reg_date}</div>"
+            for writer, reg_date in zip(
+                fb_sel["등록자"].to_numpy(), fb_sel["등록일자"].to_numpy()
+            )
+        ]
+
+        for idx, content, meta_html, note in zip(
+            fb_sel.index, fb_sel["고객대응내용"].to_numpy(), fb_meta_html, fb_notes
+        ):
             with st.container():
                 st.markdown('<div class="feedback-item">', unsafe_allow_html=True)
                 col1, col2 = st.columns([6, 1])
 
                 with col1:
-                    st.write(f"**내용:** {row['고객대응내용']}")
-                    st.markdown(
-                        f"<div class='feedback-meta'>등록자: {row['등록자']} | 등록일: {row['등록일자']}</div>",
-                        unsafe_allow_html=True,
-                    )
-                    if row.get("비고"):
+                    st.write(f"**내용:** {content}")
+                    st.markdown(meta_html, unsafe_allow_html=True)
+                    if note:
                         st.markdown(
-                            f"<div class='feedback-note'>비고: {row['비고']}</div>",
+                            f"<div class='feedback-note'>비고: {note}</div>",
                             unsafe_allow_html=True,
                         )
 
@@ -2052,46 +2508,12 @@ else:
                     if LOGIN_TYPE == "admin":
                         if st.button("🗑 삭제", key=f"del_{idx}"):
                             fb_all = fb_all.drop(index=idx)
-                            st.session_state["feedback_df"] = fb_all
                             save_feedback(FEEDBACK_PATH, fb_all)
                             st.success("삭제 완료!")
                             st.rerun()
                             st.markdown("</div>", unsafe_allow_html=True)
 
-    st.markdown("### ➕ 빠른 활동등록")
-
-    user_rows = unmatched_global.copy()
-
-    sel_quick = st.selectbox(
-        "활동등록할 계약 선택",
-        options=["(선택)"] + user_rows["계약번호_정제"].astype(str).tolist(),
-        key="quick_cn",
-    )
-
-    if sel_quick != "(선택)":
-        row = user_rows[user_rows["계약번호_정제"] == sel_quick].iloc[0]
-        st.write(f"**계약번호:** {sel_quick}")
-        st.write(f"**상호:** {row['상호']}")
-        st.write(f"**설치주소:** {row['설치주소_표시']}")
-
-        quick_content = st.text_area("활동내용 입력", key="quick_content")
-        quick_writer = LOGIN_USER
-        quick_note = st.text_input("비고", key="quick_note")
-
-        if st.button("등록", key="quick_submit"):
-            new_row = {
-                "계약번호_정제": sel_quick,
-                "고객대응내용": quick_content,
-                "등록자": quick_writer,
-                "등록일자": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "비고": quick_note,
-            }
-            fb_all = st.session_state["feedback_df"]
-            fb_all = pd.concat([fb_all, pd.DataFrame([new_row])], ignore_index=True)
-            st.session_state["feedback_df"] = fb_all
-            save_feedback(FEEDBACK_PATH, fb_all)
-            st.success("등록 완료되었습니다.")
-            st.rerun()
+    render_quick_register()
 
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -2107,8 +2529,10 @@ with tab_filter:
 
 # ----------------------------------------------------
 # TAB ALERT — 담당자 알림(베타)
+# (fragment → 담당자 선택/이메일 입력/발송 시 이 탭만 다시 실행)
 # ----------------------------------------------------
-with tab_alert:
+@st.fragment
+def render_alert_tab():
     st.subheader("📨 담당자 알림 발송 (베타)")
 
     st.markdown(
@@ -2145,21 +2569,26 @@ with tab_alert:
     else:
         st.success(f"담당자 매핑 파일 로드 완료 — 총 {len(contact_df)}명")
 
-        unmatched_alert = unmatched_global.copy()
-        grouped = unmatched_alert.groupby("구역담당자_통합")
+        unmatched_alert = unmatched_global
 
         st.markdown("### 📧 알림 발송 대상(담당자별 비매칭 계약 수)")
 
-        alert_list = []
-        for mgr, g in grouped:
-            mgr = safe_str(mgr)
-            if not mgr:
-                continue
-            count = g["계약번호_정제"].nunique()
-            email = manager_contacts.get(mgr, {}).get("email", "")
-            alert_list.append([mgr, email, count])
-
-        alert_df = pd.DataFrame(alert_list, columns=["담당자", "이메일", "비매칭 계약수"])
+        # 담당자별 유니크 계약수는 groupby.nunique 한 번으로 집계 (그룹별 Python 루프 없음)
+        mgr_counts = unmatched_alert.groupby("구역담당자_통합", observed=True)[
+            "_cn_code"
+        ].nunique()
+        mgr_names = [safe_str(m) for m in mgr_counts.index]
+
+        alert_df = pd.DataFrame(
+            {
+                "담당자": mgr_names,
+                "이메일": [
+                    manager_contacts.get(m, {}).get("email", "") for m in mgr_names
+                ],
+                "비매칭 계약수": mgr_counts.to_numpy(),
+            }
+        )
+        alert_df = alert_df[alert_df["담당자"] != ""].reset_index(drop=True)
         st.dataframe(alert_df, use_container_width=True, height=300)
 
         st.markdown("---")
@@ -2179,7 +2608,7 @@ with tab_alert:
             custom_email = st.text_input("이메일 주소(변경 또는 직접 입력)", value=mgr_email)
 
             df_mgr_rows = unmatched_alert[
-                unmatched_alert["구역담당자_통합"].astype(str) == sel_mgr
+                unmatched_alert["구역담당자_통합"] == sel_mgr
             ]
 
             st.write(f"🔍 발송 데이터: **{len(df_mgr_rows)}건** 비매칭 VOC")
@@ -2217,7 +2646,7 @@ with tab_alert:
                         msg["To"] = custom_email
                         msg.set_content(body)
 
-                        csv_bytes = df_mgr_rows.to_csv(index=False).encode("utf-8-sig")
+                        csv_bytes = to_csv_bytes(df_mgr_rows)
                         msg.add_attachment(
                             csv_bytes,
                             maintype="application",
@@ -2234,3 +2663,7 @@ with tab_alert:
                         st.success(f"✅ 이메일 발송 완료 → {custom_email}")
                     except Exception as e:
                         st.error(f"❌ 이메일 전송 실패: {e}")
+
+
+with tab_alert:
+    render_alert_tab()